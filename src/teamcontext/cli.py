@@ -1,23 +1,90 @@
 from __future__ import annotations
 
 import argparse
-import getpass
+import copy
+import functools
 import json
+import os
 import re
 import shutil
-import subprocess
 import sys
+import time
 from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
 
-import yaml
-
-from teamcontext.engine import OpenVikingEngine
+if TYPE_CHECKING:
+    import subprocess
 
 DEFAULT_VENDOR_REPO = "https://github.com/volcengine/OpenViking.git"
 DEFAULT_VENDOR_REF = "main"
+DEFAULT_LARGE_SAVE_THRESHOLD = 1000
+
+# yaml, subprocess, tempfile, getpass and the engine are imported on first use to keep CLI startup fast.
+_yaml: Any = None
+_YamlLoader: Any = None
+_YamlDumper: Any = None
+
+
+def _get_yaml() -> Any:
+    global _yaml, _YamlLoader, _YamlDumper
+    if _yaml is None:
+        import yaml
+
+        # Prefer the libyaml C bindings; fall back to the pure-Python safe loader/dumper.
+        _YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        _YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        _yaml = yaml
+    return _yaml
+
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+_SECRET_RULES = (
+    # (name, pattern, case-insensitive)
+    ("aws_access_key", r"\bAKIA[0-9A-Z]{16}\b", False),
+    ("private_key", r"-----BEGIN (?:RSA|EC|OPENSSH|PGP) PRIVATE KEY-----", False),
+    ("generic_api_key", r"\b(?:api[-_ ]?key|token|secret)\b\s*[:=]\s*[\"']?[A-Za-z0-9_\-]{16,}[\"']?", True),
+)
+_SECRET_RULE_NAMES = tuple(name for name, _, _ in _SECRET_RULES)
+# Zero-width lookaheads let one pass report every rule, even when matches overlap.
+_SECRET_RE = re.compile(
+    "|".join(
+        f"(?=(?P<{name}>{'(?i:' + pattern + ')' if caseless else pattern}))"
+        for name, pattern, caseless in _SECRET_RULES
+    )
+)
+
+
+@functools.cache
+def _secret_db() -> Any:
+    # Optional Hyperscan database for linear-time scanning, compiled on the first scan; None means
+    # the regex path is used. UTF8|UCP keep \b Unicode-aware, matching the re fallback.
+    try:
+        import hyperscan  # type: ignore
+    except ImportError:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[pattern.encode("utf-8") for _, pattern, _ in _SECRET_RULES],
+            ids=list(range(len(_SECRET_RULES))),
+            elements=len(_SECRET_RULES),
+            flags=[
+                hyperscan.HS_FLAG_SINGLEMATCH
+                | hyperscan.HS_FLAG_UTF8
+                | hyperscan.HS_FLAG_UCP
+                | (hyperscan.HS_FLAG_CASELESS if caseless else 0)
+                for _, _, caseless in _SECRET_RULES
+            ],
+        )
+    except Exception:  # pragma: no cover - depends on the installed hyperscan build
+        return None
+    return db
 
 
 class TcError(RuntimeError):
@@ -58,31 +125,138 @@ class TcPaths:
         )
 
 
+def _json_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            # orjson rejects lone surrogates (undecodable file names); the stdlib escapes them.
+            pass
+    return (json.dumps(obj, indent=2, sort_keys=True) + "\n").encode("utf-8")
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # pragma: no cover - directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:  # pragma: no cover - not every filesystem supports directory fsync
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write_bytes(path: Path, data: bytes, *, sync_dir: bool = True) -> None:
+    # Write a uniquely named sibling temp file and rename it over the target so readers never see
+    # partial state and concurrent tc runs never share a temp file.
+    # Callers writing several files to one directory pass sync_dir=False and call _fsync_dir once.
+    import tempfile
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        try:
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, 0o644)
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    if sync_dir:
+        _fsync_dir(path.parent)
+
+
+def _read_json(path: Path) -> Any:
+    data = path.read_bytes()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # _json_dumps writes lone surrogates as \udcXX escapes, which only the stdlib accepts.
+            pass
+    return json.loads(data)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_lock_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    return _read_json(Path(path_str))
+
+
 def _load_lock(lock_path: Path) -> dict[str, Any]:
-    if not lock_path.exists():
+    try:
+        st = lock_path.stat()
+    except FileNotFoundError:
         return {}
-    return json.loads(lock_path.read_text(encoding="utf-8"))
+    return copy.deepcopy(_load_lock_cached(str(lock_path), st.st_mtime_ns, st.st_size))
 
 
 def _write_lock(lock_path: Path, payload: dict[str, Any]) -> None:
-    lock_path.parent.mkdir(parents=True, exist_ok=True)
-    lock_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    data = _json_dumps(payload)
+    try:
+        if lock_path.read_bytes() == data:
+            return
+    except FileNotFoundError:
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write_bytes(lock_path, data)
+    _load_lock_cached.cache_clear()
+
+
+@functools.lru_cache(maxsize=32)
+def _load_config_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    with open(path_str, "rb") as f:
+        data = _get_yaml().load(f, Loader=_YamlLoader)
+    return data if isinstance(data, dict) else {}
 
 
 def _load_config(config_path: Path) -> dict[str, Any]:
-    if not config_path.exists():
+    # Keyed on (path, mtime_ns, size) so edits made outside this process are picked up.
+    try:
+        st = config_path.stat()
+    except FileNotFoundError:
         return {}
-    data = yaml.safe_load(config_path.read_text(encoding="utf-8"))
-    return data if isinstance(data, dict) else {}
+    return copy.deepcopy(_load_config_cached(str(config_path), st.st_mtime_ns, st.st_size))
 
 
 def _write_config(config_path: Path, payload: dict[str, Any]) -> None:
     config_path.parent.mkdir(parents=True, exist_ok=True)
-    config_path.write_text(yaml.safe_dump(payload, sort_keys=False), encoding="utf-8")
+    yaml = _get_yaml()
+    config_path.write_text(yaml.dump(payload, Dumper=_YamlDumper, sort_keys=False), encoding="utf-8")
+    _load_config_cached.cache_clear()
 
 
-def _run(cmd: list[str], cwd: Path | None = None) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(cmd, cwd=str(cwd) if cwd else None, check=False, capture_output=True, text=True)
+def _yaml_backend() -> tuple[bool, str]:
+    try:
+        import yaml._yaml  # type: ignore  # noqa: F401
+    except ImportError:
+        return False, "libyaml unavailable; using pure-Python YAML parser"
+    return True, "libyaml"
+
+
+def _run(cmd: list[str], cwd: Path | None = None, capture: bool = True) -> subprocess.CompletedProcess[str]:
+    import subprocess
+
+    if capture:
+        return subprocess.run(cmd, cwd=str(cwd) if cwd else None, check=False, capture_output=True, text=True)
+    # Discard stdout (e.g. clone/fetch progress) and keep only the error stream.
+    return subprocess.run(
+        cmd,
+        cwd=str(cwd) if cwd else None,
+        check=False,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
 
 
 def _resolve_root(project_root: str | None) -> Path:
@@ -97,13 +271,10 @@ def _project_root_from_args(args: argparse.Namespace) -> str | None:
 
 
 def _ensure_base_dirs(paths: TcPaths) -> None:
-    dirs = [
-        paths.tc_dir,
+    # Only leaf directories are listed; mkdir(parents=True) creates the ancestors.
+    leaves = [
         paths.vendor_dir,
         paths.state_dir,
-        paths.viking_dir,
-        paths.agfs_dir,
-        paths.shared_dir,
         paths.sessions_dir,
         paths.index_dir,
         paths.shared_dir / "decisions",
@@ -112,7 +283,7 @@ def _ensure_base_dirs(paths: TcPaths) -> None:
         paths.shared_dir / "candidates",
         paths.shared_dir / "changelog",
     ]
-    for d in dirs:
+    for d in leaves:
         d.mkdir(parents=True, exist_ok=True)
 
 
@@ -139,7 +310,39 @@ def _merge_gitignore(root: Path) -> tuple[bool, list[str]]:
     return True, to_add
 
 
+_GIT_SHA_RE = re.compile(r"[0-9a-f]{40}(?:[0-9a-f]{24})?")
+
+
+def _read_git_head(git_dir: Path) -> str | None:
+    head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    if not head.startswith("ref: "):
+        return head if _GIT_SHA_RE.fullmatch(head) else None
+    ref = head[len("ref: ") :].strip()
+    try:
+        sha = (git_dir / ref).read_text(encoding="utf-8").strip()
+        return sha if _GIT_SHA_RE.fullmatch(sha) else None
+    except FileNotFoundError:
+        pass
+    try:
+        packed = (git_dir / "packed-refs").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    for line in packed.splitlines():
+        sha, _, name = line.partition(" ")
+        if name == ref and _GIT_SHA_RE.fullmatch(sha):
+            return sha
+    return None
+
+
 def _git_commit(cwd: Path) -> str | None:
+    # Reading the ref files avoids forking git; worktrees, submodules (where .git is a file)
+    # and unborn branches fall through to `git rev-parse`.
+    try:
+        commit = _read_git_head(cwd / ".git")
+    except OSError:
+        commit = None
+    if commit:
+        return commit
     cp = _run(["git", "rev-parse", "HEAD"], cwd=cwd)
     if cp.returncode != 0:
         return None
@@ -147,6 +350,12 @@ def _git_commit(cwd: Path) -> str | None:
 
 
 def _git_has_remote(cwd: Path) -> bool:
+    try:
+        config = (cwd / ".git" / "config").read_text(encoding="utf-8")
+    except OSError:
+        pass
+    else:
+        return any(line.strip().startswith('[remote "') for line in config.splitlines())
     cp = _run(["git", "remote"], cwd=cwd)
     if cp.returncode != 0:
         return False
@@ -179,17 +388,21 @@ def _maybe_clone_vendor(paths: TcPaths, lock: dict[str, Any]) -> tuple[bool, str
         if checkout.returncode != 0:
             return False, f"vendor checkout failed: {checkout.stderr.strip()}"
         commit = _git_commit(paths.vendor_openviking)
-        if commit:
+        if commit and lock["openviking"].get("resolved_commit") != commit:
             lock["openviking"]["resolved_commit"] = commit
             _write_lock(paths.lock_path, lock)
         return True, "vendor already present; checked out requested ref"
 
-    clone = _run(["git", "clone", "--depth", "1", "--branch", ref, repo, str(paths.vendor_openviking)], cwd=paths.root)
+    clone = _run(
+        ["git", "clone", "--depth", "1", "--branch", ref, repo, str(paths.vendor_openviking)],
+        cwd=paths.root,
+        capture=False,
+    )
     if clone.returncode != 0:
-        return False, f"vendor clone skipped: {clone.stderr.strip() or clone.stdout.strip() or 'unknown git error'}"
+        return False, f"vendor clone skipped: {clone.stderr.strip() or 'unknown git error'}"
 
     commit = _git_commit(paths.vendor_openviking)
-    if commit:
+    if commit and lock["openviking"].get("resolved_commit") != commit:
         lock["openviking"]["resolved_commit"] = commit
         _write_lock(paths.lock_path, lock)
     return True, "vendor cloned and pinned"
@@ -202,9 +415,9 @@ def _checkout_vendor_ref(paths: TcPaths, lock: dict[str, Any], ref: str) -> tupl
         return False, "vendor repository is missing; run `tc init` first"
 
     if _git_has_remote(paths.vendor_openviking):
-        fetch = _run(["git", "fetch", "--tags", "--prune"], cwd=paths.vendor_openviking)
+        fetch = _run(["git", "fetch", "--tags", "--prune"], cwd=paths.vendor_openviking, capture=False)
         if fetch.returncode != 0:
-            return False, f"git fetch failed: {fetch.stderr.strip() or fetch.stdout.strip()}"
+            return False, f"git fetch failed: {fetch.stderr.strip()}"
 
     checkout = _run(["git", "checkout", ref], cwd=paths.vendor_openviking)
     if checkout.returncode != 0:
@@ -214,10 +427,11 @@ def _checkout_vendor_ref(paths: TcPaths, lock: dict[str, Any], ref: str) -> tupl
     if not commit:
         return False, "unable to resolve checked out commit"
 
-    lock.setdefault("openviking", {})
-    lock["openviking"]["ref"] = ref
-    lock["openviking"]["resolved_commit"] = commit
-    _write_lock(paths.lock_path, lock)
+    pinned = lock.setdefault("openviking", {})
+    if (pinned.get("ref"), pinned.get("resolved_commit")) != (ref, commit):
+        pinned["ref"] = ref
+        pinned["resolved_commit"] = commit
+        _write_lock(paths.lock_path, lock)
     return True, f"checked out {ref} ({commit[:12]})"
 
 
@@ -236,7 +450,11 @@ def cmd_init(args: argparse.Namespace) -> int:
                 "index": str(paths.index_dir.relative_to(root)),
             },
             "security": {"secret_scan": True, "block_on_findings": True},
-            "engine": {"name": "openviking", "vendor_path": str(paths.vendor_openviking.relative_to(root))},
+            "engine": {
+                "name": "openviking",
+                "vendor_path": str(paths.vendor_openviking.relative_to(root)),
+                "text_index": True,
+            },
         }
         _write_config(paths.config_path, config)
 
@@ -286,85 +504,171 @@ def cmd_init(args: argparse.Namespace) -> int:
     return 0
 
 
-def _collect_shared_files(shared_dir: Path) -> list[Path]:
-    if not shared_dir.exists():
-        return []
-    return sorted([p for p in shared_dir.rglob("*.md") if p.is_file()])
+def _iter_markdown_entries(root: Path, dir_mtimes: dict[str, int] | None = None) -> Iterator[os.DirEntry[str]]:
+    # When ``dir_mtimes`` is given, each visited directory's mtime is recorded before it is listed.
+    stack = [str(root)]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            if dir_mtimes is not None:
+                dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+            it = os.scandir(dir_path)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md") and entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _iter_shared(root: Path, dir_mtimes: dict[str, int] | None = None) -> Iterator[tuple[str, os.stat_result]]:
+    for entry in _iter_markdown_entries(root, dir_mtimes):
+        yield entry.path, entry.stat(follow_symlinks=False)
+
+
+def _iter_markdown(root: Path) -> Iterator[str]:
+    for entry in _iter_markdown_entries(root):
+        yield entry.path
 
 
 def _index_state_path(paths: TcPaths) -> Path:
     return paths.state_dir / "sync_state.json"
 
 
-def _load_sync_state(paths: TcPaths) -> dict[str, float]:
+def _load_sync_payload(paths: TcPaths) -> dict[str, Any]:
     state_path = _index_state_path(paths)
     if not state_path.exists():
         return {}
-    data = json.loads(state_path.read_text(encoding="utf-8"))
-    files = data.get("files", {})
+    data = _read_json(state_path)
+    return data if isinstance(data, dict) else {}
+
+
+def _load_sync_state(paths: TcPaths) -> dict[str, int]:
+    files = _load_sync_payload(paths).get("files", {})
     return files if isinstance(files, dict) else {}
 
 
-def _write_sync_state(paths: TcPaths, state: dict[str, float]) -> None:
+def _write_sync_state(
+    paths: TcPaths, state: dict[str, int], *, dirs: dict[str, int] | None = None, sync_dir: bool = True
+) -> None:
     state_path = _index_state_path(paths)
-    payload = {"updated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z", "files": state}
-    state_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    payload: dict[str, Any] = {"updated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z", "files": state}
+    if dirs is not None:
+        payload["dirs"] = dirs
+    _atomic_write_bytes(state_path, _json_dumps(payload), sync_dir=sync_dir)
 
 
 def _save_state_path(paths: TcPaths) -> Path:
     return paths.state_dir / "save_state.json"
 
 
-def _load_save_state(paths: TcPaths) -> dict[str, dict[str, int]]:
+def _load_save_state(paths: TcPaths) -> dict[str, tuple[int, int]]:
     state_path = _save_state_path(paths)
     if not state_path.exists():
         return {}
-    data = json.loads(state_path.read_text(encoding="utf-8"))
+    data = _read_json(state_path)
     files = data.get("files", {})
-    return files if isinstance(files, dict) else {}
+    if not isinstance(files, dict):
+        return {}
+    state: dict[str, tuple[int, int]] = {}
+    for rel, entry in files.items():
+        if isinstance(entry, list) and len(entry) == 2:
+            state[rel] = (entry[0], entry[1])
+        elif isinstance(entry, dict):
+            # Older save states stored {"mtime_ns": ..., "size": ...} per file.
+            state[rel] = (entry.get("mtime_ns"), entry.get("size"))
+    return state
 
 
-def _write_save_state(paths: TcPaths, files: dict[str, dict[str, int]]) -> None:
+def _write_save_state(paths: TcPaths, files: dict[str, tuple[int, int]]) -> None:
     state_path = _save_state_path(paths)
     payload = {"updated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z", "files": files}
-    state_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    _atomic_write_bytes(state_path, _json_dumps(payload))
+
+
+_SHARED_CATEGORIES = ("decisions", "patterns", "runbooks", "candidates", "changelog")
 
 
 def _category_counts(paths: TcPaths) -> dict[str, int]:
     counts: dict[str, int] = {}
-    for category in ["decisions", "patterns", "runbooks", "candidates", "changelog"]:
-        base = paths.shared_dir / category
-        if not base.exists():
-            counts[category] = 0
-            continue
-        counts[category] = len([p for p in base.rglob("*.md") if p.is_file()])
+    for category in _SHARED_CATEGORIES:
+        counts[category] = sum(1 for _ in _iter_markdown(paths.shared_dir / category))
     return counts
 
 
+def _shared_scan(shared_dir: Path) -> tuple[list[str], dict[str, int]]:
+    # One walk yields both the shared file list and the per-category counts.
+    files: list[str] = []
+    counts = dict.fromkeys(_SHARED_CATEGORIES, 0)
+    prefix_len = len(str(shared_dir)) + 1
+    for path in _iter_markdown(shared_dir):
+        files.append(path)
+        category = path[prefix_len:].split(os.sep, 1)[0]
+        if category in counts:
+            counts[category] += 1
+    return files, counts
+
+
 def _has_shared_history(paths: TcPaths) -> bool:
     counts = _category_counts(paths)
     return (counts.get("changelog", 0) + counts.get("candidates", 0)) > 0
 
 
-def _sync_snapshot(paths: TcPaths) -> tuple[str | None, int]:
-    state_path = _index_state_path(paths)
-    if not state_path.exists():
+def _cached_shared_scan(paths: TcPaths, payload: dict[str, Any]) -> tuple[list[str], dict[str, int]] | None:
+    # Reuse the file list recorded by the last sync while every shared directory still has the
+    # mtime it had then; adding, removing or renaming a file anywhere below changes one of them.
+    files = payload.get("files")
+    dirs = payload.get("dirs")
+    if not isinstance(files, dict) or not isinstance(dirs, dict) or not dirs:
+        return None
+    root_str = str(paths.root)
+    for rel, mtime_ns in dirs.items():
+        try:
+            if os.stat(os.path.join(root_str, rel)).st_mtime_ns != mtime_ns:
+                return None
+        except OSError:
+            return None
+    counts = dict.fromkeys(_SHARED_CATEGORIES, 0)
+    prefix = os.path.join(str(paths.shared_dir.relative_to(paths.root)), "")
+    for rel in files:
+        category = rel[len(prefix) :].split(os.sep, 1)[0] if rel.startswith(prefix) else ""
+        if category in counts:
+            counts[category] += 1
+    return list(files), counts
+
+
+def _sync_snapshot(payload: dict[str, Any]) -> tuple[str | None, int]:
+    if not payload:
         return None, 0
-    payload = json.loads(state_path.read_text(encoding="utf-8"))
     updated_at = payload.get("updated_at")
     files = payload.get("files", {})
     file_count = len(files) if isinstance(files, dict) else 0
     return updated_at if isinstance(updated_at, str) else None, file_count
 
 
+def _text_index_enabled(paths: TcPaths) -> bool:
+    return bool((_load_config(paths.config_path).get("engine") or {}).get("text_index", True))
+
+
+def _index_file(paths: TcPaths) -> Path:
+    # index.txt unless engine.text_index is false, in which case only the binary index.bin exists.
+    return paths.index_dir / ("index.txt" if _text_index_enabled(paths) else "index.bin")
+
+
 def _bootstrap_prompt(paths: TcPaths, sync_payload: dict[str, Any] | None = None) -> str:
+    index_file = _index_file(paths)
     lines = [
         "Read the following TeamContext sources before coding:\n"
     ]
     lines.append(f"- {paths.shared_dir / 'decisions'}\n")
     lines.append(f"- {paths.shared_dir / 'patterns'}\n")
     lines.append(f"- {paths.shared_dir / 'runbooks'}\n")
-    lines.append(f"- {paths.index_dir / 'index.txt'}\n")
+    if index_file.suffix == ".txt":
+        lines.append(f"- {index_file}\n")
+    else:
+        lines.append(f"- {index_file} (binary; the text index is disabled by engine.text_index)\n")
     if sync_payload:
         lines.append("Latest sync snapshot:\n")
         lines.append(
@@ -372,7 +676,7 @@ def _bootstrap_prompt(paths: TcPaths, sync_payload: dict[str, Any] | None = None
             f"changed_files={sync_payload.get('changed_files', 0)} | "
             f"removed_files={sync_payload.get('removed_files', 0)}\n"
         )
-    lines.append("If index.txt is missing, run `tc sync` first.\n")
+    lines.append(f"If {index_file.name} is missing, run `tc sync` first.\n")
     lines.append(
         'If decisions/patterns/runbooks are empty, report "no approved team context yet" '
         "and continue with code-level context.\n"
@@ -384,6 +688,68 @@ def _bootstrap_prompt(paths: TcPaths, sync_payload: dict[str, Any] | None = None
     return "".join(lines)
 
 
+_WORKFLOW_MD = """\
+# TeamContext Agent Workflow
+
+Use these intent->command mappings in vibe coding sessions:
+
+- User says: "save recent context to tc"
+- Run: `tc save --auto-bootstrap-if-empty`
+
+- User says: "sync latest context"
+- Run: `tc sync --json`
+
+Execution rule:
+- Execute mapped commands immediately; do not only print command text.
+- Only return command text without execution if user explicitly asks for command-only output.
+
+Post-execution response contract:
+- Include command, exit code, and key results from stdout.
+Then summarize key deltas from JSON output for the user.
+"""
+
+
+_DEFAULT_INTENTS: dict[str, Any] = {
+    "version": 1,
+    "default_mode": "execute",
+    "rules": [
+        {
+            "intent": "save recent context to tc",
+            "command": ["tc", "save", "--auto-bootstrap-if-empty"],
+            "execute_immediately": True,
+        },
+        {
+            "intent": "sync latest context",
+            "command": ["tc", "sync", "--json"],
+            "execute_immediately": True,
+        },
+    ],
+    "command_only_opt_out": "Only skip execution when user explicitly asks for command-only output.",
+}
+
+
+def _normalize_intent(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _build_intents_index(rules: list[Any]) -> dict[str, dict[str, Any]]:
+    # Maps normalized intent text to its rule; the first rule wins, matching file order.
+    index: dict[str, dict[str, Any]] = {}
+    for rule in rules:
+        if isinstance(rule, dict) and isinstance(rule.get("intent"), str):
+            index.setdefault(_normalize_intent(rule["intent"]), rule)
+    return index
+
+
+@functools.lru_cache(maxsize=8)
+def _load_intents_index_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, dict[str, Any]] | None:
+    # Keyed on (path, mtime_ns, size) like _load_config_cached; None marks a malformed rules list.
+    rules = _read_json(Path(path_str)).get("rules", [])
+    if not isinstance(rules, list):
+        return None
+    return _build_intents_index(rules)
+
+
 def _write_agent_files(paths: TcPaths, sync_payload: dict[str, Any] | None = None) -> tuple[Path, Path, Path]:
     agent_dir = paths.tc_dir / "agent"
     agent_dir.mkdir(parents=True, exist_ok=True)
@@ -391,114 +757,80 @@ def _write_agent_files(paths: TcPaths, sync_payload: dict[str, Any] | None = Non
     workflow_path = agent_dir / "workflow.md"
     intents_path = agent_dir / "intents.json"
     bootstrap_path.write_text(_bootstrap_prompt(paths, sync_payload) + "\n", encoding="utf-8")
-    workflow_path.write_text(
-        "\n".join(
-            [
-                "# TeamContext Agent Workflow",
-                "",
-                "Use these intent->command mappings in vibe coding sessions:",
-                "",
-                '- User says: "save recent context to tc"',
-                "- Run: `tc save --auto-bootstrap-if-empty`",
-                "",
-                '- User says: "sync latest context"',
-                "- Run: `tc sync --json`",
-                "",
-                "Execution rule:",
-                "- Execute mapped commands immediately; do not only print command text.",
-                "- Only return command text without execution if user explicitly asks for command-only output.",
-                "",
-                "Post-execution response contract:",
-                "- Include command, exit code, and key results from stdout.",
-                "Then summarize key deltas from JSON output for the user.",
-            ]
-        )
-        + "\n",
-        encoding="utf-8",
-    )
-    intents_payload = {
-        "version": 1,
-        "default_mode": "execute",
-        "rules": [
-            {
-                "intent": "save recent context to tc",
-                "command": ["tc", "save", "--auto-bootstrap-if-empty"],
-                "execute_immediately": True,
-            },
-            {
-                "intent": "sync latest context",
-                "command": ["tc", "sync", "--json"],
-                "execute_immediately": True,
-            },
-        ],
-        "command_only_opt_out": "Only skip execution when user explicitly asks for command-only output.",
-    }
-    intents_path.write_text(json.dumps(intents_payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    workflow_path.write_text(_WORKFLOW_MD, encoding="utf-8")
+    intents_path.write_bytes(_json_dumps(_DEFAULT_INTENTS))
     return bootstrap_path, workflow_path, intents_path
 
 
 def _run_sync(paths: TcPaths, root: Path) -> dict[str, Any]:
-    shared_files = _collect_shared_files(paths.shared_dir)
+    walk_second_ns = time.time_ns() // 1_000_000_000 * 1_000_000_000
+    dir_mtimes: dict[str, int] = {}
+    # Sort on path components to keep the same order as sorting Path objects.
+    file_stats = sorted(_iter_shared(paths.shared_dir, dir_mtimes), key=lambda item: item[0].split(os.sep))
     before = _load_sync_state(paths)
-    after: dict[str, float] = {}
-    changed = 0
-    changed_paths: list[str] = []
-
-    for p in shared_files:
-        rel = str(p.relative_to(root))
-        mtime = p.stat().st_mtime
-        after[rel] = mtime
-        if rel not in before or before[rel] != mtime:
-            changed += 1
-            changed_paths.append(rel)
-
-    removed_paths = sorted(set(before) - set(after))
+    root_len = len(os.path.join(str(root), ""))
+    after = {path[root_len:]: st.st_mtime_ns for path, st in file_stats}
+    # Racy-timestamp guard, as in git's index: with 1 s mtimes a file added later in the same
+    # second as the walk leaves its directory's mtime unchanged, so directory mtimes are only
+    # recorded for tc status when all of them predate the second the walk started.
+    dirs: dict[str, int] | None = None
+    if all(mtime_ns < walk_second_ns for mtime_ns in dir_mtimes.values()):
+        dirs = {path[root_len:]: mtime_ns for path, mtime_ns in dir_mtimes.items()}
+    # Entries written by older versions hold float seconds and never compare equal, so they
+    # are reported as changed once and rewritten as integer nanoseconds.
+    changed_paths = [rel for rel, mtime_ns in after.items() if before.get(rel) != mtime_ns]
+    changed = len(changed_paths)
+    removed_paths = sorted(before.keys() - after.keys())
     removed = len(removed_paths)
-    _write_sync_state(paths, after)
+    _write_sync_state(paths, after, dirs=dirs, sync_dir=False)
+    from teamcontext.engine import OpenVikingEngine
+
     engine = OpenVikingEngine(paths.vendor_openviking)
-    engine_result = engine.index_shared_docs(shared_files, root, paths.index_dir / "index.txt")
+    engine_result = engine.index_shared_entries(
+        file_stats,
+        root,
+        paths.index_dir / "index.txt",
+        text_index=_text_index_enabled(paths),
+    )
 
     summary_path = paths.state_dir / "sync_summary.txt"
-    summary_path.write_text(
-        "\n".join(
-            [
-                f"time: {datetime.utcnow().isoformat(timespec='seconds')}Z",
-                f"shared_files: {len(shared_files)}",
-                f"changed_files: {changed}",
-                f"removed_files: {removed}",
-            ]
-        )
-        + "\n",
-        encoding="utf-8",
+    _atomic_write_bytes(
+        summary_path,
+        (
+            "\n".join(
+                [
+                    f"time: {datetime.utcnow().isoformat(timespec='seconds')}Z",
+                    f"shared_files: {len(file_stats)}",
+                    f"changed_files: {changed}",
+                    f"removed_files: {removed}",
+                ]
+            )
+            + "\n"
+        ).encode("utf-8"),
+        sync_dir=False,
     )
 
     payload = {
         "ok": True,
-        "shared_files_scanned": len(shared_files),
+        "shared_files_scanned": len(file_stats),
         "changed_files": changed,
         "removed_files": removed,
         "changed_paths": changed_paths,
         "removed_paths": removed_paths,
-        "index_file": str(paths.index_dir / "index.txt"),
+        "index_file": str(_index_file(paths)),
         "engine_message": engine_result.message,
     }
     payload["bootstrap_prompt"] = _bootstrap_prompt(paths, payload)
-    (paths.state_dir / "last_sync.json").write_text(
-        json.dumps(
-            {
-                "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
-                **payload,
-            },
-            indent=2,
-            sort_keys=True,
-        )
-        + "\n",
-        encoding="utf-8",
+    _atomic_write_bytes(
+        paths.state_dir / "last_sync.json",
+        _json_dumps({"generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z", **payload}),
+        sync_dir=False,
     )
+    _fsync_dir(paths.state_dir)
     return payload
 
 
-def _tracked_workspace_files(root: Path) -> dict[str, dict[str, int]]:
+def _tracked_workspace_files(root: Path) -> dict[str, tuple[int, int]]:
     excluded_dirs = {
         ".git",
         ".tc",
@@ -528,29 +860,40 @@ def _tracked_workspace_files(root: Path) -> dict[str, dict[str, int]]:
         ".sqlite",
     }
 
-    files: dict[str, dict[str, int]] = {}
-    for path in root.rglob("*"):
-        if path.is_symlink():
-            continue
-        if not path.is_file():
-            continue
-        rel = path.relative_to(root)
-        rel_str = str(rel)
-        if any(rel_str == d or rel_str.startswith(f"{d}/") for d in excluded_dirs):
-            continue
-        if path.suffix.lower() in excluded_suffixes:
+    files: dict[str, tuple[int, int]] = {}
+    # Excluded directories are pruned during the walk, so their contents are never listed.
+    stack = [(str(root), "")]
+    while stack:
+        dir_path, prefix = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except (FileNotFoundError, NotADirectoryError):
             continue
-        stat = path.stat()
-        files[rel_str] = {"mtime_ns": int(stat.st_mtime_ns), "size": int(stat.st_size)}
+        with it:
+            for entry in it:
+                rel = prefix + entry.name
+                # Checked before is_dir: worktrees and submodule checkouts have a .git *file*.
+                if rel in excluded_dirs:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel + "/"))
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if os.path.splitext(entry.name)[1].lower() in excluded_suffixes:
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                files[rel] = (st.st_mtime_ns, st.st_size)
     return files
 
 
 def _workspace_diff(
-    before: dict[str, dict[str, int]], after: dict[str, dict[str, int]]
+    before: dict[str, tuple[int, int]], after: dict[str, tuple[int, int]]
 ) -> tuple[list[str], list[str], list[str]]:
-    added = sorted([k for k in after if k not in before])
-    deleted = sorted([k for k in before if k not in after])
-    modified = sorted([k for k in after if k in before and after[k] != before[k]])
+    after_keys, before_keys = after.keys(), before.keys()
+    added = sorted(after_keys - before_keys)
+    deleted = sorted(before_keys - after_keys)
+    modified = sorted(k for k in after_keys & before_keys if after[k] != before[k])
     return added, modified, deleted
 
 
@@ -596,44 +939,76 @@ def cmd_sync(args: argparse.Namespace) -> int:
     return 0
 
 
+@functools.lru_cache(maxsize=1)
+def _current_user() -> str:
+    import getpass
+
+    return getpass.getuser()
+
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+# Maps every non-alphanumeric ASCII character to "-" for the ASCII fast path.
+_SLUG_TABLE = str.maketrans({chr(i): "-" for i in range(128) if not chr(i).isalnum()})
+
+
 def _slugify(text: str) -> str:
-    value = re.sub(r"[^a-zA-Z0-9]+", "-", text.strip().lower()).strip("-")
+    lowered = text.strip().lower()
+    if lowered.isascii():
+        value = "-".join(filter(None, lowered.translate(_SLUG_TABLE).split("-")))
+    else:
+        value = _SLUG_RE.sub("-", lowered).strip("-")
     return value or "update"
 
 
 def _detect_secrets(text: str) -> list[str]:
-    findings: list[str] = []
-    rules = {
-        "aws_access_key": r"\bAKIA[0-9A-Z]{16}\b",
-        "private_key": r"-----BEGIN (?:RSA|EC|OPENSSH|PGP) PRIVATE KEY-----",
-        "generic_api_key": r"(?i)\b(?:api[-_ ]?key|token|secret)\b\s*[:=]\s*[\"']?[A-Za-z0-9_\-]{16,}[\"']?",
-    }
-    for name, pattern in rules.items():
-        if re.search(pattern, text):
-            findings.append(name)
-    return findings
+    db = _secret_db()
+    if db is not None:
+        hits: set[int] = set()
+
+        def on_match(rule_id: int, start: int, end: int, flags: int, context: Any) -> None:
+            hits.add(rule_id)
+
+        # HS_FLAG_UTF8 requires valid UTF-8, so lone surrogates are encoded as '?' (not a word character).
+        db.scan(text.encode("utf-8", "replace"), match_event_handler=on_match)
+        return [name for i, name in enumerate(_SECRET_RULE_NAMES) if i in hits]
+
+    found = {m.lastgroup for m in _SECRET_RE.finditer(text)}
+    return [name for name in _SECRET_RULE_NAMES if name in found]
+
+
+_CANDIDATE_TMPL = (
+    "# Candidate: {kind}\n"
+    "\n"
+    "- date: {day}\n"
+    "- author: {user}\n"
+    "- topic: {topic}\n"
+    "\n"
+    "## Summary\n"
+    "{summary}\n"
+    "\n"
+    "## Review Notes\n"
+    "- pending review\n"
+)
+
+_CHANGELOG_TMPL = (
+    "# Changelog: {topic}\n"
+    "\n"
+    "- date: {day}\n"
+    "- author: {user}\n"
+    "\n"
+    "## What changed\n"
+    "{summary}\n"
+    "\n"
+    "## Candidate generated\n"
+    "{candidate}\n"
+)
 
 
 def _write_candidate(paths: TcPaths, kind: str, topic: str, summary: str, user: str, day: date) -> Path:
     slug = _slugify(topic)
     out = paths.shared_dir / "candidates" / f"{day.isoformat()}-{user}-{kind}-{slug}.md"
     out.write_text(
-        "\n".join(
-            [
-                f"# Candidate: {kind}",
-                "",
-                f"- date: {day.isoformat()}",
-                f"- author: {user}",
-                f"- topic: {topic}",
-                "",
-                "## Summary",
-                summary,
-                "",
-                "## Review Notes",
-                "- pending review",
-            ]
-        )
-        + "\n",
+        _CANDIDATE_TMPL.format(kind=kind, day=day.isoformat(), user=user, topic=topic, summary=summary),
         encoding="utf-8",
     )
     return out
@@ -646,21 +1021,13 @@ def _write_commit_artifacts(
     changelog_path = paths.shared_dir / "changelog" / changelog_name
     candidate_path = _write_candidate(paths, kind, topic, summary, user, day)
     changelog_path.write_text(
-        "\n".join(
-            [
-                f"# Changelog: {topic}",
-                "",
-                f"- date: {day.isoformat()}",
-                f"- author: {user}",
-                "",
-                "## What changed",
-                summary,
-                "",
-                "## Candidate generated",
-                str(candidate_path.relative_to(root)),
-            ]
-        )
-        + "\n",
+        _CHANGELOG_TMPL.format(
+            topic=topic,
+            day=day.isoformat(),
+            user=user,
+            summary=summary,
+            candidate=candidate_path.relative_to(root),
+        ),
         encoding="utf-8",
     )
     return changelog_path, candidate_path
@@ -676,7 +1043,7 @@ def cmd_commit(args: argparse.Namespace) -> int:
     secret_scan_enabled = bool(security_cfg.get("secret_scan", True))
     block_on_findings = bool(security_cfg.get("block_on_findings", True))
 
-    user = _slugify(args.user or getpass.getuser())
+    user = _slugify(args.user or _current_user())
     topic = args.topic.strip() if args.topic else "general-update"
     summary = args.summary.strip() if args.summary else "No summary provided"
     day = date.today()
@@ -742,7 +1109,7 @@ def cmd_save(args: argparse.Namespace) -> int:
         print("`tc save --bootstrap --force-large-save`")
         return 3
 
-    user = _slugify(args.user or getpass.getuser())
+    user = _slugify(args.user or _current_user())
     topic = args.topic.strip() if args.topic else _auto_topic_from_changes(changed)
     summary = args.summary.strip() if args.summary else _auto_summary(added, modified, deleted)
     day = date.today()
@@ -791,8 +1158,13 @@ def cmd_doctor(args: argparse.Namespace) -> int:
     lock = _load_lock(paths.lock_path) if paths.lock_path.exists() else {}
     vendor_ok, vendor_msg = _vendor_health(lock, paths.vendor_openviking)
     findings.append(("vendor", vendor_ok, vendor_msg))
+    from teamcontext.engine import OpenVikingEngine
+
     engine_result = OpenVikingEngine(paths.vendor_openviking).health()
     findings.append(("engine", engine_result.ok, engine_result.message))
+    # A missing libyaml only costs speed, so report it without failing the check.
+    _, yaml_msg = _yaml_backend()
+    findings.append(("yaml", True, yaml_msg))
 
     writable_checks = [paths.tc_dir, paths.viking_dir, paths.index_dir]
     for d in writable_checks:
@@ -842,16 +1214,16 @@ def cmd_status(args: argparse.Namespace) -> int:
     paths = TcPaths.for_root(root)
     _ensure_base_dirs(paths)
 
-    counts = _category_counts(paths)
-    last_sync, synced_files = _sync_snapshot(paths)
-    shared_files = _collect_shared_files(paths.shared_dir)
+    sync_payload = _load_sync_payload(paths)
+    shared_files, counts = _cached_shared_scan(paths, sync_payload) or _shared_scan(paths.shared_dir)
+    last_sync, synced_files = _sync_snapshot(sync_payload)
 
     print("TeamContext status")
     print(f"- root: {root}")
     print(f"- shared files: {len(shared_files)}")
-    for category in ["decisions", "patterns", "runbooks", "candidates", "changelog"]:
+    for category in _SHARED_CATEGORIES:
         print(f"- {category}: {counts[category]}")
-    print(f"- local index file: {paths.index_dir / 'index.txt'}")
+    print(f"- local index file: {_index_file(paths)}")
     print(f"- last sync: {last_sync or 'never'}")
     print(f"- synced file entries: {synced_files}")
     return 0
@@ -864,21 +1236,18 @@ def cmd_agent_run(args: argparse.Namespace) -> int:
 
     intent = " ".join(args.intent).strip()
     intents_path = paths.tc_dir / "agent" / "intents.json"
-    if not intents_path.exists():
+    try:
+        st = intents_path.stat()
+    except FileNotFoundError:
         print(f"error: missing intents file: {intents_path}", file=sys.stderr)
         return 2
 
-    payload = json.loads(intents_path.read_text(encoding="utf-8"))
-    rules = payload.get("rules", [])
-    if not isinstance(rules, list):
+    intents_index = _load_intents_index_cached(str(intents_path), st.st_mtime_ns, st.st_size)
+    if intents_index is None:
         print("error: invalid intents.json format", file=sys.stderr)
         return 2
 
-    match = None
-    for rule in rules:
-        if isinstance(rule, dict) and rule.get("intent") == intent:
-            match = rule
-            break
+    match = intents_index.get(_normalize_intent(intent))
     if not match:
         print(f"error: no mapped command for intent: {intent}", file=sys.stderr)
         return 2
@@ -893,25 +1262,49 @@ def cmd_agent_run(args: argparse.Namespace) -> int:
         return 2
 
     # Execute mapped command exactly, preserving output format.
+    direct = _direct_mapped_command(root, command[1:])
+    if direct is not None:
+        return globals()[direct.handler](direct)
     return main(["--project-root", str(root), *command[1:]])
 
 
-def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(prog="tc", description="TeamContext CLI")
-    parser.add_argument("--project-root", help="Project root (default: current directory)")
+def _direct_mapped_command(root: Path, argv: list[str]) -> argparse.Namespace | None:
+    # The shipped intents dispatch straight to their cmd_* function without another argparse pass;
+    # customized mappings go back through main().
+    if argv in (["sync"], ["sync", "--json"]):
+        return argparse.Namespace(project_root=str(root), json="--json" in argv, handler="cmd_sync")
+    if argv in (["save"], ["save", "--auto-bootstrap-if-empty"]):
+        return argparse.Namespace(
+            project_root=str(root),
+            kind="pattern",
+            topic=None,
+            summary=None,
+            user=None,
+            bootstrap=False,
+            auto_bootstrap_if_empty="--auto-bootstrap-if-empty" in argv,
+            large_save_threshold=DEFAULT_LARGE_SAVE_THRESHOLD,
+            force_large_save=False,
+            allow_findings=False,
+            handler="cmd_save",
+        )
+    return None
 
-    sub = parser.add_subparsers(dest="command", required=True)
 
+def _add_init_parser(sub: Any) -> None:
     p_init = sub.add_parser("init", help="Initialize TeamContext layout and lock")
     p_init.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
     p_init.add_argument("--vendor-ref", help="OpenViking git ref to pin (default: main)")
-    p_init.set_defaults(func=cmd_init)
+    p_init.set_defaults(handler="cmd_init")
+
 
+def _add_sync_parser(sub: Any) -> None:
     p_sync = sub.add_parser("sync", help="Refresh local sync state and index")
     p_sync.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
     p_sync.add_argument("--json", action="store_true", help="Print machine-readable JSON output")
-    p_sync.set_defaults(func=cmd_sync)
+    p_sync.set_defaults(handler="cmd_sync")
 
+
+def _add_save_parser(sub: Any) -> None:
     p_save = sub.add_parser("save", help="Auto-save recent workspace context for agents")
     p_save.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
     p_save.add_argument("--kind", choices=["decision", "pattern", "runbook"], default="pattern")
@@ -931,8 +1324,8 @@ def build_parser() -> argparse.ArgumentParser:
     p_save.add_argument(
         "--large-save-threshold",
         type=int,
-        default=1000,
-        help="Safety threshold for file-count in bootstrap mode (default: 1000)",
+        default=DEFAULT_LARGE_SAVE_THRESHOLD,
+        help=f"Safety threshold for file-count in bootstrap mode (default: {DEFAULT_LARGE_SAVE_THRESHOLD})",
     )
     p_save.add_argument(
         "--force-large-save",
@@ -940,8 +1333,10 @@ def build_parser() -> argparse.ArgumentParser:
         help="Allow bootstrap save even when it exceeds the safety threshold",
     )
     p_save.add_argument("--allow-findings", action="store_true", help="Allow secret scan findings")
-    p_save.set_defaults(func=cmd_save)
+    p_save.set_defaults(handler="cmd_save")
+
 
+def _add_commit_parser(sub: Any) -> None:
     p_commit = sub.add_parser("commit", help="Generate changelog + candidate artifacts")
     p_commit.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
     p_commit.add_argument("--topic", required=True, help="Topic slug/title for this publication")
@@ -949,39 +1344,100 @@ def build_parser() -> argparse.ArgumentParser:
     p_commit.add_argument("--kind", choices=["decision", "pattern", "runbook"], default="decision")
     p_commit.add_argument("--user", help="Override author id")
     p_commit.add_argument("--allow-findings", action="store_true", help="Allow secret scan findings")
-    p_commit.set_defaults(func=cmd_commit)
+    p_commit.set_defaults(handler="cmd_commit")
 
+
+def _add_doctor_parser(sub: Any) -> None:
     p_doctor = sub.add_parser("doctor", help="Diagnose setup and environment")
     p_doctor.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
     p_doctor.add_argument("--quiet", action="store_true", help="Suppress detail output")
-    p_doctor.set_defaults(func=cmd_doctor)
+    p_doctor.set_defaults(handler="cmd_doctor")
+
 
+def _add_status_parser(sub: Any) -> None:
     p_status = sub.add_parser("status", help="Show TeamContext content and sync status")
     p_status.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
-    p_status.set_defaults(func=cmd_status)
+    p_status.set_defaults(handler="cmd_status")
 
+
+def _add_agent_parser(sub: Any) -> None:
     p_agent = sub.add_parser("agent", help="Agent-oriented intent execution")
     agent_sub = p_agent.add_subparsers(dest="agent_command", required=True)
     p_agent_run = agent_sub.add_parser("run", help="Execute mapped command for an intent")
     p_agent_run.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
     p_agent_run.add_argument("intent", nargs="+", help='Intent text, e.g. "sync latest context"')
-    p_agent_run.set_defaults(func=cmd_agent_run)
+    p_agent_run.set_defaults(handler="cmd_agent_run")
+
 
+def _add_vendor_parser(sub: Any) -> None:
     p_vendor = sub.add_parser("vendor", help="Vendor management commands")
     vendor_sub = p_vendor.add_subparsers(dest="vendor_command", required=True)
     p_vendor_upgrade = vendor_sub.add_parser("upgrade", help="Upgrade pinned OpenViking ref")
     p_vendor_upgrade.add_argument("--project-root", dest="project_root_local", help="Project root (default: current directory)")
     p_vendor_upgrade.add_argument("--ref", required=True, help="Tag, branch, or commit to checkout")
-    p_vendor_upgrade.set_defaults(func=cmd_vendor_upgrade)
+    p_vendor_upgrade.set_defaults(handler="cmd_vendor_upgrade")
+
+
+# Ordered as listed in `tc --help`.
+_SUBPARSER_BUILDERS = {
+    "init": _add_init_parser,
+    "sync": _add_sync_parser,
+    "save": _add_save_parser,
+    "commit": _add_commit_parser,
+    "doctor": _add_doctor_parser,
+    "status": _add_status_parser,
+    "agent": _add_agent_parser,
+    "vendor": _add_vendor_parser,
+}
+
+
+def _peek_command(argv: list[str]) -> str | None:
+    # Return the subcommand named in argv, or None when the full parser is needed (help, a
+    # missing or unknown command, or any other option such as an abbreviated --project-root,
+    # which argparse resolves by prefix) so usage, errors and parsing stay identical.
+    tokens = iter(argv)
+    for token in tokens:
+        if token == "--project-root":
+            next(tokens, None)
+            continue
+        if token.startswith("--project-root="):
+            continue
+        if token.startswith("-"):
+            return None
+        return token if token in _SUBPARSER_BUILDERS else None
+    return None
+
+
+def build_parser(argv: list[str] | None = None) -> argparse.ArgumentParser:
+    return _build_parser(_peek_command(sys.argv[1:] if argv is None else argv))
+
+
+# parse_args only writes to the returned Namespace, so one parser per command shape can be reused.
+# Subparsers record their cmd_* handler by name and main() resolves it at call time, so a cached
+# parser never pins a stale function object.
+@functools.cache
+def _build_parser(command: str | None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="tc", description="TeamContext CLI")
+    parser.add_argument("--project-root", help="Project root (default: current directory)")
 
+    if command is None:
+        sub = parser.add_subparsers(dest="command", required=True)
+        for add_parser in _SUBPARSER_BUILDERS.values():
+            add_parser(sub)
+        return parser
+    # A fixed metavar keeps usage lines identical when only one subparser is built.
+    sub = parser.add_subparsers(dest="command", required=True, metavar="{" + ",".join(_SUBPARSER_BUILDERS) + "}")
+    _SUBPARSER_BUILDERS[command](sub)
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
-    parser = build_parser()
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = build_parser(argv)
     args = parser.parse_args(argv)
     try:
-        return args.func(args)
+        return globals()[args.handler](args)
     except TcError as exc:
         print(f"error: {exc}", file=sys.stderr)
         return 2
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-import inspect
+import functools
+import importlib
+import os
+import struct
 import sys
 from dataclasses import dataclass
 from pathlib import Path
@@ -13,16 +16,115 @@ class EngineResult:
     message: str
 
 
+# One index line per shared file; paths go in as filesystem bytes (undecodable names survive).
+_INDEX_LINE = b"- %b | mtime=%d | bytes=%d\n"
+
+
+# Binary sidecar (index.bin): magic, then per file a little-endian (signed mtime_ns, size,
+# path length) header followed by the fs-encoded path relative to the project root.
+# st_mtime_ns is negative for files dated before 1970.
+BINARY_INDEX_MAGIC = b"TCIDX1\n"
+_INDEX_RECORD = struct.Struct("<qQH")
+
+
+def read_binary_index(path: Path) -> list[tuple[str, int, int]]:
+    """Decode an ``index.bin`` sidecar into ``(relative_path, mtime_ns, size)`` tuples."""
+    data = memoryview(path.read_bytes())
+    if data[: len(BINARY_INDEX_MAGIC)] != BINARY_INDEX_MAGIC:
+        raise ValueError(f"not a TeamContext binary index: {path}")
+    entries: list[tuple[str, int, int]] = []
+    offset = len(BINARY_INDEX_MAGIC)
+    while offset < len(data):
+        mtime_ns, size, rel_len = _INDEX_RECORD.unpack_from(data, offset)
+        offset += _INDEX_RECORD.size
+        entries.append((os.fsdecode(bytes(data[offset : offset + rel_len])), mtime_ns, size))
+        offset += rel_len
+    return entries
+
+
+def _write_file(path: Path, data: bytes | bytearray) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+@functools.lru_cache(maxsize=256)
+def _signature_info(fn: Any) -> tuple[bool, tuple[str, ...]]:
+    # inspect pulls in ast/dis/tokenize; only import it once a real OpenViking module is in play.
+    import inspect
+
+    params = inspect.signature(fn).parameters.values()
+    accepts_var_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params)
+    return accepts_var_kwargs, tuple(p.name for p in params)
+
+
+@functools.lru_cache(maxsize=32)
+def _pick_ctor_arg(cls: Any) -> str | None:
+    # Name of the single keyword to construct ``cls`` with ("" for no arguments), or None
+    # when the signature cannot be inspected.
+    try:
+        accepts_var_kwargs, param_names = _signature_info(cls)
+    except (TypeError, ValueError):
+        return None
+    if accepts_var_kwargs:
+        return "vendor_path"
+    for name in ("vendor_path", "vendor_repo", "project_root"):
+        if name in param_names:
+            return name
+    return ""
+
+
+class _IndexKwargs:
+    """Keyword arguments offered to OpenViking index APIs, derived only when requested."""
+
+    NAMES = ("shared_files", "shared_paths", "root", "root_path", "index_dir", "index_path")
+
+    def __init__(self, shared_files: list[Path], root: Path, index_dir: Path) -> None:
+        self.shared_files = shared_files
+        self.root = root
+        self.index_dir = index_dir
+
+    @functools.cached_property
+    def shared_paths(self) -> list[str]:
+        return [os.fspath(p) for p in self.shared_files]
+
+    @functools.cached_property
+    def root_path(self) -> str:
+        return str(self.root)
+
+    @functools.cached_property
+    def index_path(self) -> str:
+        return str(self.index_dir)
+
+    def select(self, names: tuple[str, ...]) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in names if name in _INDEX_KWARG_NAMES}
+
+
+_INDEX_KWARG_NAMES = frozenset(_IndexKwargs.NAMES)
+
+
 class OpenVikingEngine:
     """Thin integration layer around a vendored OpenViking checkout."""
 
+    # sys.path entries already added by any instance, so repeat imports skip the path scan.
+    _paths_added: set[str] = set()
+    # vendor repo -> (.git/HEAD mtime_ns, import error message) for imports known to fail.
+    _import_failed: dict[Path, tuple[int | None, str]] = {}
+
     def __init__(self, vendor_repo: Path) -> None:
         self.vendor_repo = vendor_repo
 
     def health(self) -> EngineResult:
-        if not self.vendor_repo.exists():
-            return EngineResult(False, "vendor repo path missing")
-        if not (self.vendor_repo / ".git").exists():
+        # One stat on .git covers the common case; the repo itself is only checked when that fails.
+        try:
+            os.stat(os.path.join(self.vendor_repo, ".git"))
+        except (FileNotFoundError, NotADirectoryError):
+            if not os.path.exists(self.vendor_repo):
+                return EngineResult(False, "vendor repo path missing")
             return EngineResult(False, "vendor repo is not a git checkout")
 
         try:
@@ -31,24 +133,60 @@ class OpenVikingEngine:
             return EngineResult(False, f"import failed: {exc}")
         return EngineResult(True, "import ok")
 
-    def index_shared_docs(self, shared_files: list[Path], root: Path, index_file: Path) -> EngineResult:
+    def index_shared_docs(
+        self,
+        shared_files: list[str | os.PathLike[str]],
+        root: str | os.PathLike[str],
+        index_file: Path,
+        text_index: bool = True,
+    ) -> EngineResult:
+        file_stats = [(os.fspath(p), os.stat(p)) for p in shared_files]
+        return self.index_shared_entries(file_stats, root, index_file, text_index)
+
+    def index_shared_entries(
+        self,
+        file_stats: list[tuple[str, os.stat_result]],
+        root: str | os.PathLike[str],
+        index_file: Path,
+        text_index: bool = True,
+    ) -> EngineResult:
+        # Same as index_shared_docs, for callers that already hold (path, stat) pairs from a walk;
+        # the file list handed to OpenViking is derived from them so both always agree.
+        root_str = os.fspath(root)
+        root_prefix = os.path.join(root_str, "")
+        for path, _ in file_stats:
+            # Same contract as Path.relative_to: files outside root are rejected, not mis-sliced.
+            if not path.startswith(root_prefix):
+                raise ValueError(f"{path!r} is not under {root_str!r}")
+        shared_files = [Path(path) for path, _ in file_stats]
+
         api_message = "api unavailable"
         imported = False
         try:
             module = self._import_openviking()
             imported = True
-            api_message = self._try_index_with_module(module, shared_files, root, index_file.parent)
+            api_message = self._try_index_with_module(module, shared_files, Path(root_str), index_file.parent)
         except Exception as exc:
             api_message = f"import failed: {exc}"
 
-        lines = ["# TeamContext Local Index", ""]
-        lines.append(f"- engine_imported={imported}")
-        lines.append(f"- engine_api={api_message}")
-        for p in shared_files:
-            rel = p.relative_to(root)
-            stat = p.stat()
-            lines.append(f"- {rel} | mtime={int(stat.st_mtime)} | bytes={stat.st_size}")
-        index_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        root_len = len(root_prefix)
+        records = bytearray(BINARY_INDEX_MAGIC)
+        text: bytearray | None = None
+        if text_index:
+            text = bytearray(b"# TeamContext Local Index\n\n")
+            text += f"- engine_imported={imported}\n- engine_api={api_message}\n".encode("utf-8")
+        for path, stat in file_stats:
+            rel = os.fsencode(path[root_len:])
+            records += _INDEX_RECORD.pack(stat.st_mtime_ns, stat.st_size, len(rel))
+            records += rel
+            if text is not None:
+                text += _INDEX_LINE % (rel, int(stat.st_mtime), stat.st_size)
+        _write_file(index_file.with_suffix(".bin"), records)
+        if text is not None:
+            _write_file(index_file, text)
+        else:
+            # A text index left over from an earlier sync would list stale files.
+            index_file.unlink(missing_ok=True)
 
         if imported and api_message.startswith("called "):
             return EngineResult(True, f"indexed via OpenViking ({api_message})")
@@ -59,25 +197,14 @@ class OpenVikingEngine:
     def _try_index_with_module(
         self, module: Any, shared_files: list[Path], root: Path, index_dir: Path
     ) -> str:
-        shared_paths = [str(p) for p in shared_files]
-        kwargs = {
-            "shared_files": shared_files,
-            "shared_paths": shared_paths,
-            "root": root,
-            "root_path": str(root),
-            "index_dir": index_dir,
-            "index_path": str(index_dir),
-        }
+        kwargs = _IndexKwargs(shared_files, root, index_dir)
 
         module_fn = getattr(module, "index_shared_docs", None)
         if callable(module_fn):
             self._invoke_callable(module_fn, kwargs)
             return "called module.index_shared_docs"
 
-        for cls_name in ("OpenVikingEngine", "Engine"):
-            cls = getattr(module, cls_name, None)
-            if cls is None:
-                continue
+        for cls_name, cls in self._engine_classes(module):
             obj = self._construct_engine_instance(cls, kwargs)
             method = getattr(obj, "index_shared_docs", None)
             if callable(method):
@@ -86,40 +213,84 @@ class OpenVikingEngine:
 
         return "no known index API"
 
-    def _construct_engine_instance(self, cls: Any, kwargs: dict[str, Any]) -> Any:
-        for candidate in (
+    def _engine_classes(self, module: Any) -> list[tuple[str, Any]]:
+        # getattr, like the index_shared_docs lookup, so lazy PEP 562 module exports are found.
+        found = []
+        for cls_name in ("OpenVikingEngine", "Engine"):
+            cls = getattr(module, cls_name, None)
+            if cls is not None:
+                found.append((cls_name, cls))
+        return found
+
+    def _construct_engine_instance(self, cls: Any, kwargs: _IndexKwargs) -> Any:
+        candidates = (
             {"vendor_path": str(self.vendor_repo)},
             {"vendor_repo": self.vendor_repo},
-            {"project_root": kwargs["root_path"]},
+            {"project_root": kwargs.root_path},
             {},
-        ):
+        )
+        ctor_arg = _pick_ctor_arg(cls)
+        if ctor_arg is not None:
+            try:
+                return cls(**next(c for c in candidates if ctor_arg in c or not c))
+            except TypeError:
+                pass
+        # Signature unavailable or the picked call was rejected: probe each constructor form.
+        for candidate in candidates:
             try:
                 return cls(**candidate)
             except TypeError:
                 continue
         return cls()
 
-    def _invoke_callable(self, fn: Any, kwargs: dict[str, Any]) -> Any:
-        signature = inspect.signature(fn)
-        accepts_var_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in signature.parameters.values())
+    def _invoke_callable(self, fn: Any, kwargs: _IndexKwargs) -> Any:
+        # Bound methods are recreated on every attribute access, so cache on the underlying function.
+        func = getattr(fn, "__func__", None)
+        if func is not None:
+            accepts_var_kwargs, param_names = _signature_info(func)
+            param_names = param_names[1:]
+        else:
+            accepts_var_kwargs, param_names = _signature_info(fn)
         if accepts_var_kwargs:
-            return fn(**kwargs)
-        filtered = {name: kwargs[name] for name in signature.parameters if name in kwargs}
-        return fn(**filtered)
+            return fn(**kwargs.select(_IndexKwargs.NAMES))
+        return fn(**kwargs.select(param_names))
 
     def _import_openviking(self) -> Any:
+        module = sys.modules.get("openviking")
+        if module is not None:
+            return module
+
+        # A previous failure is reused until the vendor checkout moves (HEAD is rewritten).
+        head_mtime = self._vendor_head_mtime()
+        failed = self._import_failed.get(self.vendor_repo)
+        if failed is not None and failed[0] == head_mtime:
+            raise ImportError(failed[1])
+
         candidates = [
             self.vendor_repo,
             self.vendor_repo / "src",
             self.vendor_repo / "python",
         ]
         for candidate in candidates:
+            candidate_str = str(candidate)
+            if candidate_str in self._paths_added:
+                continue
             if candidate.exists():
-                candidate_str = str(candidate)
                 if candidate_str not in sys.path:
                     sys.path.insert(0, candidate_str)
+                self._paths_added.add(candidate_str)
 
         # Import module only to verify integration path is valid.
-        import openviking  # type: ignore  # noqa: F401
+        try:
+            importlib.import_module("openviking")
+        except ImportError as exc:
+            self._import_failed[self.vendor_repo] = (head_mtime, str(exc))
+            raise
+        self._import_failed.pop(self.vendor_repo, None)
+        return sys.modules["openviking"]
 
-        return openviking
+    def _vendor_head_mtime(self) -> int | None:
+        try:
+            return (self.vendor_repo / ".git" / "HEAD").stat().st_mtime_ns
+        except OSError:
+            return None
@@ -1,55 +1,181 @@
 from __future__ import annotations
 
+import os
+import re
+import sys
 import tempfile
-import types
 import unittest
 from pathlib import Path
+from types import ModuleType
 from unittest import mock
 
-from teamcontext.engine import OpenVikingEngine
+# Fixtures live on tmpfs when the host has one, so fixture writes and cleanup never touch disk.
+_TMP_PARENT = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+_CALLED_MARKER = re.compile(r"engine_api=called module\.index_shared_docs")
+_FALLBACK_MARKER = re.compile(r"engine_api=no known index API")
+
+
+class _Fake:
+    __slots__ = ("index_shared_docs",)
+
+
+class _EmptyFake:
+    pass
+
+
+# Stateless stand-in for an openviking module with no index API; shared by every test.
+_EMPTY_FAKE = _EmptyFake()
 
 
 class EngineTests(unittest.TestCase):
-    def setUp(self) -> None:
-        self.tmp = tempfile.TemporaryDirectory()
-        self.root = Path(self.tmp.name)
-        self.index_file = self.root / "index.txt"
-        self.shared_file = self.root / "a.md"
-        self.shared_file.write_text("# a\n", encoding="utf-8")
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Imported here rather than at module level so collection and filtered runs skip the engine;
+        # an unimportable engine skips the whole class once instead of erroring in every test.
+        try:
+            from teamcontext.engine import OpenVikingEngine
+        except ImportError as exc:
+            raise unittest.SkipTest(f"teamcontext.engine unavailable: {exc}") from exc
+
+        cls._Engine = OpenVikingEngine
+        # No test modifies a.md, so the fixture is built once; each test writes its own index file.
+        cls.tmp = tempfile.TemporaryDirectory(dir=_TMP_PARENT)
+        # String forms are what the engine ends up using, so tests pass them directly.
+        cls.root_str = cls.tmp.name
+        cls.root = Path(cls.root_str)
+        cls.shared_file_str = os.path.join(cls.root_str, "a.md")
+        with open(cls.shared_file_str, "w", encoding="utf-8") as handle:
+            handle.write("# a\n")
+        cls._engine = OpenVikingEngine(cls.root)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
 
-    def tearDown(self) -> None:
-        self.tmp.cleanup()
+    def setUp(self) -> None:
+        self.index_file = self.root / f"{self._testMethodName}.txt"
+        # Tests stub _import_openviking with an instance attribute; drop it so the next test sees the method.
+        self.addCleanup(vars(self._engine).pop, "_import_openviking", None)
 
     def test_index_uses_module_level_api_when_available(self) -> None:
         calls: list[str] = []
 
-        fake = types.SimpleNamespace()
+        fake = _Fake()
 
         def index_shared_docs(shared_paths: list[str], index_path: str, **_: object) -> None:
             calls.extend(shared_paths)
-            self.assertEqual(index_path, str(self.root))
+            self.assertEqual(index_path, self.root_str)
 
         fake.index_shared_docs = index_shared_docs
 
-        engine = OpenVikingEngine(self.root)
-        with mock.patch.object(engine, "_import_openviking", return_value=fake):
-            result = engine.index_shared_docs([self.shared_file], self.root, self.index_file)
+        engine = self._engine
+        engine._import_openviking = lambda: fake
+        result = engine.index_shared_docs([self.shared_file_str], self.root_str, self.index_file)
 
         self.assertTrue(result.ok)
         self.assertIn("called module.index_shared_docs", result.message)
-        self.assertEqual(calls, [str(self.shared_file)])
-        self.assertIn("engine_api=called module.index_shared_docs", self.index_file.read_text(encoding="utf-8"))
+        self.assertEqual(calls, [self.shared_file_str])
+        self.assertRegex(self.index_file.read_text(encoding="utf-8"), _CALLED_MARKER)
 
-    def test_index_falls_back_when_api_missing(self) -> None:
-        fake = types.SimpleNamespace()
+    def test_index_entries_hands_openviking_the_indexed_files(self) -> None:
+        calls: list[str] = []
+        fake = _Fake()
+        fake.index_shared_docs = lambda shared_paths: calls.extend(shared_paths)
 
-        engine = OpenVikingEngine(self.root)
-        with mock.patch.object(engine, "_import_openviking", return_value=fake):
-            result = engine.index_shared_docs([self.shared_file], self.root, self.index_file)
+        engine = self._engine
+        engine._import_openviking = lambda: fake
+        file_stats = [(self.shared_file_str, os.stat(self.shared_file_str))]
+        result = engine.index_shared_entries(file_stats, self.root_str, self.index_file)
+
+        self.assertIn("called module.index_shared_docs", result.message)
+        self.assertEqual(calls, [self.shared_file_str])
+
+    def test_index_falls_back_when_api_missing(self) -> None:
+        engine = self._engine
+        engine._import_openviking = lambda: _EMPTY_FAKE
+        result = engine.index_shared_docs([self.shared_file_str], self.root_str, self.index_file)
 
         self.assertTrue(result.ok)
         self.assertIn("fallback writer", result.message)
-        self.assertIn("engine_api=no known index API", self.index_file.read_text(encoding="utf-8"))
+        self.assertRegex(self.index_file.read_text(encoding="utf-8"), _FALLBACK_MARKER)
+
+    def test_index_finds_engine_class_exported_through_module_getattr(self) -> None:
+        calls: list[str] = []
+
+        class LazyEngine:
+            def index_shared_docs(self, shared_paths: list[str]) -> None:
+                calls.extend(shared_paths)
+
+        def module_getattr(name: str) -> object:
+            if name == "Engine":
+                return LazyEngine
+            raise AttributeError(name)
+
+        module = ModuleType("openviking")
+        module.__getattr__ = module_getattr
+
+        engine = self._engine
+        engine._import_openviking = lambda: module
+        result = engine.index_shared_docs([self.shared_file_str], self.root_str, self.index_file)
+
+        self.assertIn("called Engine.index_shared_docs", result.message)
+        self.assertEqual(calls, [self.shared_file_str])
+
+    def test_binary_index_round_trips_without_text_index(self) -> None:
+        from teamcontext.engine import read_binary_index
+
+        engine = self._engine
+        engine._import_openviking = lambda: _EMPTY_FAKE
+        engine.index_shared_docs([self.shared_file_str], self.root_str, self.index_file, text_index=False)
+
+        st = os.stat(self.shared_file_str)
+        self.assertFalse(self.index_file.exists())
+        self.assertEqual(read_binary_index(self.index_file.with_suffix(".bin")), [("a.md", st.st_mtime_ns, st.st_size)])
+
+    def test_binary_index_keeps_pre_1970_mtimes(self) -> None:
+        from teamcontext.engine import read_binary_index
+
+        old_file = os.path.join(self.root_str, f"{self._testMethodName}.md")
+        with open(old_file, "w", encoding="utf-8") as handle:
+            handle.write("# old\n")
+        os.utime(old_file, ns=(-10**18, -10**18))
+
+        engine = self._engine
+        engine._import_openviking = lambda: _EMPTY_FAKE
+        engine.index_shared_docs([old_file], self.root_str, self.index_file)
+
+        entries = read_binary_index(self.index_file.with_suffix(".bin"))
+        self.assertEqual(entries, [(os.path.basename(old_file), -10**18, os.stat(old_file).st_size)])
+
+    def test_index_rejects_files_outside_root(self) -> None:
+        engine = self._engine
+        engine._import_openviking = lambda: _EMPTY_FAKE
+        sub_root = os.path.join(self.root_str, "sub")
+        cases = ((os.path.relpath(self.shared_file_str), self.root_str), (self.shared_file_str, sub_root))
+        for shared_file, root in cases:
+            with self.assertRaises(ValueError):
+                engine.index_shared_docs([shared_file], root, self.index_file)
+
+    def test_failed_import_is_not_retried_until_vendor_changes(self) -> None:
+        engine = self._Engine(self.root / "missing-vendor")
+        self.addCleanup(self._Engine._import_failed.pop, engine.vendor_repo, None)
+        # Once the vendor dir exists it is put on sys.path; undo that for later tests.
+        saved_sys_path = list(sys.path)
+        self.addCleanup(sys.path.__setitem__, slice(None), saved_sys_path)
+        self.addCleanup(self._Engine._paths_added.discard, str(engine.vendor_repo))
+        with mock.patch("importlib.import_module", side_effect=ImportError("no openviking")) as import_module:
+            for _ in range(2):
+                with self.assertRaises(ImportError):
+                    engine._import_openviking()
+            self.assertEqual(import_module.call_count, 1)
+
+            head = engine.vendor_repo / ".git" / "HEAD"
+            head.parent.mkdir(parents=True)
+            head.write_text("ref: refs/heads/main\n", encoding="utf-8")
+            with self.assertRaises(ImportError):
+                engine._import_openviking()
+            self.assertEqual(import_module.call_count, 2)
 
 
 if __name__ == "__main__":